@@ -81,6 +81,8 @@ class BloomForSampling(base.NeuronModelBase):
             mlp = layer.mlp
 
             new_layer = self.decoder_lm_head.new_layer()
+            # The attention layer builder understands the fused QKV layout
+            new_layer.fuse_qkv_at_load = True
             new_layer.add_pre_attention_layer_norm(
                 layer.input_layernorm.weight.detach(),
                 layer.input_layernorm.bias.detach()
@@ -46,6 +46,30 @@ class QuantizationConfig:
         self.quantize_attn = quantize_attn
 
 
+class KVCacheQuantizationConfig:
+    """ The config class that contains all KV cache quantization related settings """
+
+    def __init__(self, scale, quant_dtype='s8'):
+        QUANT_DTYPE_LIST = ['s8',]
+
+        # The data type that the KV cache is stored as
+        self.quant_dtype = quant_dtype
+        if self.quant_dtype not in QUANT_DTYPE_LIST:
+            raise NotImplementedError(f"{self.quant_dtype} is not implemented. \
+                                      Available options are {','.join(QUANT_DTYPE_LIST)}")
+
+        # Static scale applied before rounding to the quantized dtype. Keys and
+        # values are multiplied by the scale on cache writes and by its
+        # reciprocal on reads; values whose magnitude exceeds 127 / scale
+        # saturate. There is no safe universal default, so the scale must be
+        # chosen from calibration of the model's K/V ranges, e.g.
+        # scale = 127 / max(abs(K), abs(V)).
+        if scale is None or scale <= 0:
+            raise ValueError(f"invalid KV cache quantization scale ({scale}): "
+                             f"a positive calibrated scale is required")
+        self.scale = scale
+
+
 class ContinuousBatchingConfig:
     """ The config class that contains all continuous batching related settings """
 
@@ -65,6 +89,13 @@ class NeuronConfig():
             attention related configurations. Default: `None`.
         quant (`QuantizationConfig`, optional): Quantization related
             configurations. Default: `None`.
+        kv_cache_quant (`KVCacheQuantizationConfig`, optional): KV cache
+            quantization related configurations. The caches are stored in the
+            quantized dtype and dequantized on read. Default: `None`.
+        attention_softmax_in_fp32 (bool, optional): Whether to upcast the
+            attention scores to fp32 for the softmax. Disabling keeps the
+            softmax in the score dtype, which avoids round-tripping the
+            largest attention intermediate through fp32. Default: `True`.
         cast_logits_dtype (`str`, optional): Cast logits to this dtype at the end
             of every forward pass. Must be selected from `["float32", "float16", "bfloat16"]`.
             Default: Upcasts all logits to `float32`.
@@ -90,6 +121,8 @@ class NeuronConfig():
         self.all_reduce_dtype = kargs.pop('all_reduce_dtype', None)
         self.sparse_attn = kargs.pop('sparse_attn', None)
         self.quant = kargs.pop('quant', None)
+        self.kv_cache_quant = kargs.pop('kv_cache_quant', None)
+        self.attention_softmax_in_fp32 = kargs.pop('attention_softmax_in_fp32', True)
         self.cast_logits_dtype = kargs.pop('cast_logits_dtype', 'float32')
         self.fuse_qkv = kargs.pop('fuse_qkv', False)
         self.continuous_batching = kargs.pop('continuous_batching', None)
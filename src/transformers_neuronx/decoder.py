@@ -893,8 +893,16 @@ class DecoderLayer(torch.nn.Module):
         dtype, _, _ = utils.parse_amp(amp)
         self.cache_dtype = dtypes.to_torch_dtype(dtype)
         self.neuron_config = NeuronConfig() if neuron_config is None else neuron_config
+        if self.neuron_config.kv_cache_quant is not None:
+            # The K/V caches are stored quantized; keys/values are quantized on
+            # cache writes and dequantized on reads (see layers/attention.py).
+            self.cache_dtype = dtypes.to_torch_dtype(self.neuron_config.kv_cache_quant.quant_dtype)
         self.extra_parameters = []
         self.allow_pad = allow_pad
+        # Opt-in for models whose layer builders understand the fused QKV
+        # weight layout: equal-sized Q/K/V projections are then merged into a
+        # single weight at load time even without the fuse_qkv option.
+        self.fuse_qkv_at_load = False
         self.attn_out_sharding = 0
         self.attn_out_transposed = True
         self.mlp_out_sharding = 0
@@ -953,6 +961,8 @@ class DecoderLayer(torch.nn.Module):
 
     def to_neuron(self):
 
+        fuse_qkv_loaded = False
+
         # If we allow padding then we need to pad non-sharded QKV weight dimensions
         if self.allow_pad:
             # Hidden size padding
@@ -997,7 +1007,21 @@ class DecoderLayer(torch.nn.Module):
                 self.attn_v_weight = maybe_pad(self.attn_v_weight, dim=1)
                 self.attn_v_bias = maybe_pad(self.attn_v_bias, dim=0)
 
-            if self.neuron_config and self.neuron_config.fuse_qkv:
+            fuse_qkv = self.neuron_config and self.neuron_config.fuse_qkv
+            if not fuse_qkv and self.fuse_qkv_at_load:
+                # Fuse equal-sized Q/K/V projections into one weight even
+                # without the fuse_qkv option, so a single GEMM produces all
+                # three projections. Unequal (grouped-query) projections and
+                # u8 weights keep the separate layout.
+                fuse_qkv = (
+                    self.attn_q_weight is not None
+                    and self.attn_k_weight is not None
+                    and self.attn_v_weight is not None
+                    and self.attn_q_weight.shape == self.attn_k_weight.shape
+                    and not utils.amp_is_u8(self.amp)
+                )
+            if fuse_qkv:
+                fuse_qkv_loaded = True
                 fused_qkv_weight = interleave_qkv(self.attn_q_weight, self.attn_k_weight, self.attn_v_weight, self.tp_degree, dim=1)
                 if self.attn_q_bias is not None:
                     fused_qkv_bias = interleave_qkv(self.attn_q_bias, self.attn_k_bias, self.attn_v_bias, self.tp_degree, dim=0)
@@ -1042,7 +1066,7 @@ class DecoderLayer(torch.nn.Module):
                                                     out_feature_dim = 1 if self.mlp_out_transposed else 0)
 
             if self.neuron_config.quant.quantize_attn:
-                if self.neuron_config.fuse_qkv:
+                if fuse_qkv_loaded:
                     fused_qkv_weight, fused_qkv_scales = \
                         quantize.maybe_quantize_weights(fused_qkv_weight, self.neuron_config.quant)
                 else:
@@ -1071,7 +1095,7 @@ class DecoderLayer(torch.nn.Module):
         maybe_shard_along_and_transform = maybe_manipulator.shard_along_and_transform
         self.pre_attn_ln_weight = maybe_duplicate(self.pre_attn_ln_weight)
         self.pre_attn_ln_bias = maybe_duplicate(self.pre_attn_ln_bias)
-        if self.neuron_config and self.neuron_config.fuse_qkv:
+        if fuse_qkv_loaded:
             self.attn_q_weight = maybe_shard_along(fused_qkv_weight, dim=1)
             self.attn_q_bias = maybe_shard_along(fused_qkv_bias, dim=0)
             self.attn_q_scales = maybe_shard_along(fused_qkv_scales, dim=0)
@@ -14,6 +14,7 @@
 # ==============================================================================
 import os
 import functools
+import weakref
 import operator
 from typing import Optional, List
 
@@ -360,6 +361,10 @@ def dot00_add1(lhs, rhs, bias, scales=None, neuron_config=None):
     return dot_add(lhs, rhs, bias, 0, 0, 1, scales, neuron_config)
 
 
+def dot20_add2(lhs, rhs, bias, scales=None, neuron_config=None):
+    return dot_add(lhs, rhs, bias, 2, 0, 2, scales, neuron_config)
+
+
 def dot10_add1(lhs, rhs, bias, scales=None, neuron_config=None):
     return dot_add(lhs, rhs, bias, 1, 0, 1, scales, neuron_config)
 
@@ -412,6 +417,23 @@ def dot_0120_add1(lhs, rhs, bias, scales=None, neuron_config=None):
                                      scales=scales, neuron_config=neuron_config)
 
 
+_reducer_cache = weakref.WeakKeyDictionary()
+
+
+def _memoize_reducer(dtype, kind, func):
+    """
+    Cache reducer computations per scribe, so every call site within one
+    program build passes the same closure object and the HLO builder reuses
+    one sub-computation per dtype. The cache entry is dropped with its scribe,
+    so completed programs are not pinned for the life of the process.
+    """
+    cache = _reducer_cache.setdefault(dtype.scribe, {})
+    key = dtype, kind
+    if key not in cache:
+        cache[key] = func
+    return cache[key]
+
+
 def gen_add_func(dtype):
 
     def add_func(scribe):
@@ -419,7 +441,7 @@ def gen_add_func(dtype):
         p1 = dtype.Parameter(parameter_number=1)
         return dtype.Add(p0, p1)
 
-    return add_func
+    return _memoize_reducer(dtype, 'add', add_func)
 
 
 def gen_assign_func(dtype):
@@ -429,7 +451,19 @@ def gen_assign_func(dtype):
         p1 = dtype.Parameter(parameter_number=1)
         return p1
 
-    return assign_func
+    return _memoize_reducer(dtype, 'assign', assign_func)
+
+
+def gen_fused_assign_func(dtype):
+
+    def fused_assign_func(scribe):
+        p0 = dtype.Parameter(parameter_number=0)
+        p1 = dtype.Parameter(parameter_number=1)
+        p2 = dtype.Parameter(parameter_number=2)
+        p3 = dtype.Parameter(parameter_number=3)
+        return scribe.tuple(dtype, dtype).Tuple(p2, p3)
+
+    return _memoize_reducer(dtype, 'fused_assign', fused_assign_func)
 
 
 def gen_max_func(dtype):
@@ -439,7 +473,7 @@ def gen_max_func(dtype):
         p1 = dtype.Parameter(parameter_number=1)
         return dtype.Maximum(p0, p1)
 
-    return max_func
+    return _memoize_reducer(dtype, 'max', max_func)
 
 
 def mlp(hidden, in_weight, in_bias, out_weight, out_bias, activation_function, tp_degree,
@@ -1448,6 +1482,37 @@ def dequantize(tensor, scales, neuron_config: NeuronConfig, scales_dim):
     return tensor
 
 
+def quantize_kv_cache(tensor, neuron_config: NeuronConfig):
+    """
+    Quantize keys/values to the KV cache storage dtype using the static scale
+    configured in neuron_config.kv_cache_quant.
+    """
+    scribe = tensor.scribe
+    quant_dtype = getattr(scribe, neuron_config.kv_cache_quant.quant_dtype)
+    dtype = tensor.dtype
+    if dtype == quant_dtype:
+        return tensor
+    scale = dtype.Constant(constant_value=neuron_config.kv_cache_quant.scale)
+    scale_br = dtype[tensor.sizes].Broadcast(scale, dimensions=[])
+    scaled = dtype[tensor.sizes].Multiply(tensor, scale_br)
+    clamp_upper_bound = dtype[tensor.sizes].Broadcast(dtype.Constant(constant_value=127.0), dimensions=[])
+    clamp_lower_bound = dtype[tensor.sizes].Broadcast(dtype.Constant(constant_value=-128.0), dimensions=[])
+    scaled = dtype[tensor.sizes].Clamp(clamp_lower_bound, scaled, clamp_upper_bound)
+    return quant_dtype[tensor.sizes].Convert(scaled)
+
+
+def dequantize_kv_cache(tensor, dtype, neuron_config: NeuronConfig):
+    """
+    Dequantize cached keys/values back to the compute dtype.
+    """
+    if tensor.dtype == dtype:
+        return tensor
+    tensor = dtype[tensor.sizes].Convert(tensor)
+    scale = dtype.Constant(constant_value=1.0 / neuron_config.kv_cache_quant.scale)
+    scale_br = dtype[tensor.sizes].Broadcast(scale, dimensions=[])
+    return dtype[tensor.sizes].Multiply(tensor, scale_br)
+
+
 def reduce_mean(tensor, dims, keepdim=False):
 
     dtype = tensor.dtype
@@ -2187,6 +2252,28 @@ def scatter(operands, scatter_indices, updates, scatter_dims, to_apply):
     return updated
 
 
+def fused_scatter(operand_a, operand_b, scatter_indices, updates_a, updates_b, scatter_dims, to_apply):
+    """
+    Scatter into two same-shaped operands with shared indices in a single op.
+
+    The variadic Scatter evaluates the scatter indices once and applies both
+    updates, which avoids the duplicated index traversal of two back-to-back
+    scatters (e.g. fused K/V cache updates).
+
+    The to_apply computation must take four scalars (one per operand, then
+    one per update) and return a two-element tuple, see gen_fused_assign_func.
+    """
+    assert operand_a.sizes == operand_b.sizes, "inconsistent sizes between operands"
+    assert operand_a.dtype == operand_b.dtype, "inconsistent dtype between operands"
+    scribe = operand_a.scribe
+    dtype = operand_a.dtype
+    sizes = operand_a.sizes
+    updated = scribe.tuple(dtype[sizes], dtype[sizes]).Scatter(
+        operand_a, operand_b, scatter_indices, updates_a, updates_b,
+        scatter_dimension_numbers=scatter_dims, to_apply=to_apply)
+    return get_tuple_element(updated, 0), get_tuple_element(updated, 1)
+
+
 def sin(tensor):
     sizes = tensor.sizes
     dtype = tensor.dtype
@@ -45,9 +45,10 @@ def query_key_value(
     n_kv_head = n_kv_head if n_kv_head > 0 else n_head
     dtype = hidden.dtype
     n_seqs, n_active_tokens, hidden_size = hidden.sizes
-    hidden = hlo.transpose210(hidden)
     hidden_size, hidden_size_tp = q_weight.sizes
-    fuse_qkv = neuron_config and neuron_config.fuse_qkv
+    # A missing K weight means the Q/K/V projections were fused into a single
+    # weight at load time (see DecoderLayer.to_neuron).
+    fuse_qkv = (neuron_config and neuron_config.fuse_qkv) or k_weight is None
     if fuse_qkv:
         hidden_size_tp //= FUSED_QKV_TP_FACTOR
         kv_hidden_size_tp = hidden_size_tp
@@ -55,12 +56,9 @@ def query_key_value(
         _, kv_hidden_size_tp = k_weight.sizes
     n_heads_tp = hidden_size_tp // d_head
 
-    hidden_r_sizes = hidden_size, n_active_tokens * n_seqs
-    hidden_r = hlo.reshape(hidden, hidden_r_sizes)
-
     if fuse_qkv:
         # QKV = (hidden @ wQKV) + bQKV
-        active_qkv = hlo.dot00_add1(hidden_r, q_weight, q_bias, q_scales, neuron_config=neuron_config)
+        active_qkv = hlo.dot20_add2(hidden, q_weight, q_bias, q_scales, neuron_config=neuron_config)
 
         # Split
         slice_lim = active_qkv.sizes[-1] // FUSED_QKV_TP_FACTOR
@@ -69,36 +67,41 @@ def query_key_value(
         active_v = hlo.slice_along(active_qkv, -1, 3*slice_lim, start=2*slice_lim)
     else:
         # Q = (hidden @ wQ) + bQ
-        active_q = hlo.dot00_add1(hidden_r, q_weight, q_bias, q_scales, neuron_config)
+        active_q = hlo.dot20_add2(hidden, q_weight, q_bias, q_scales, neuron_config)
 
         # K = (hidden @ wK) + bK
-        active_k = hlo.dot00_add1(hidden_r, k_weight, k_bias, k_scales, neuron_config)
+        active_k = hlo.dot20_add2(hidden, k_weight, k_bias, k_scales, neuron_config)
 
         # V = (hidden @ wV) + bV
-        active_v = hlo.dot00_add1(hidden_r, v_weight, v_bias, v_scales, neuron_config)
+        active_v = hlo.dot20_add2(hidden, v_weight, v_bias, v_scales, neuron_config)
 
     if shard_over_batch:
         # shard over batch
-        scribe = active_q.scribe
-        s32 = scribe.s32
-        zero = s32.Constant(constant_value=0)
-
         # Since head dimension could be padded, we would need original n_head (before padding)
         assert isinstance(n_head, int), f"invalid n_head ({n_head})"
 
+        # Flatten the (n_seqs, n_active_tokens) projections back to the 2D
+        # token-major layout the collectives below operate on. On the decode
+        # shape (n_active_tokens == 1) the token transpose is a pure relayout,
+        # so a reshape suffices.
+        flat_sizes = n_active_tokens * n_seqs, hidden_size_tp
+        flat_kv_sizes = n_active_tokens * n_seqs, kv_hidden_size_tp
+        if n_active_tokens == 1:
+            active_q = hlo.reshape(active_q, flat_sizes)
+            active_k = hlo.reshape(active_k, flat_kv_sizes)
+            active_v = hlo.reshape(active_v, flat_kv_sizes)
+        else:
+            active_q = hlo.reshape(hlo.transpose(active_q, 0, 1), flat_sizes)
+            active_k = hlo.reshape(hlo.transpose(active_k, 0, 1), flat_kv_sizes)
+            active_v = hlo.reshape(hlo.transpose(active_v, 0, 1), flat_kv_sizes)
+
         # split along batch dimension, and concat along head dimension
-        # TODO: Emit all-to-all CC op, instead of allgather+slice
         tp_degree = n_head // n_heads_tp
-        full_q = hlo.all_gather(active_q, dim=1, tp_degree=tp_degree)
-        full_k = hlo.all_gather(active_k, dim=1, tp_degree=tp_degree)
-        full_v = hlo.all_gather(active_v, dim=1, tp_degree=tp_degree)
+        active_q = hlo.all_to_all(active_q, split_dim=0, concat_dim=1, tp_degree=tp_degree)
+        active_k = hlo.all_to_all(active_k, split_dim=0, concat_dim=1, tp_degree=tp_degree)
+        active_v = hlo.all_to_all(active_v, split_dim=0, concat_dim=1, tp_degree=tp_degree)
 
         n_seqs_per_nc = n_seqs // tp_degree
-        slice_limit = n_active_tokens * n_seqs_per_nc
-        active_q = hlo.dynamic_slice_along(full_q, dim=0, size=slice_limit, start=zero)
-        active_k = hlo.dynamic_slice_along(full_k, dim=0, size=slice_limit, start=zero)
-        active_v = hlo.dynamic_slice_along(full_v, dim=0, size=slice_limit, start=zero)
-
         active_q_sizes = n_active_tokens, n_seqs_per_nc, n_head, d_head
         active_kv_sizes = n_active_tokens, n_seqs_per_nc, n_kv_head, d_head
         active_q = hlo.reshape(active_q, active_q_sizes)
@@ -112,9 +115,18 @@ def query_key_value(
         n_kv_heads_tp = n_heads_tp // n_repeats
         active_q_sizes = n_active_tokens, n_seqs, n_heads_tp, d_head
         active_kv_sizes = n_active_tokens, n_seqs, n_kv_heads_tp, d_head
-        active_q = hlo.reshape(active_q, active_q_sizes)
-        active_k = hlo.reshape(active_k, active_kv_sizes)
-        active_v = hlo.reshape(active_v, active_kv_sizes)
+        # Transpose the per-core projection outputs instead of the full hidden
+        # states; these are smaller and the transpose fuses into the GEMM output.
+        # On the decode shape (n_active_tokens == 1) the transpose is a pure
+        # relayout, so a reshape suffices.
+        if n_active_tokens == 1:
+            active_q = hlo.reshape(active_q, active_q_sizes)
+            active_k = hlo.reshape(active_k, active_kv_sizes)
+            active_v = hlo.reshape(active_v, active_kv_sizes)
+        else:
+            active_q = hlo.reshape(hlo.transpose(active_q, 0, 1), active_q_sizes)
+            active_k = hlo.reshape(hlo.transpose(active_k, 0, 1), active_kv_sizes)
+            active_v = hlo.reshape(hlo.transpose(active_v, 0, 1), active_kv_sizes)
 
     return active_q, active_k, active_v
 
@@ -152,12 +164,17 @@ def query_key_projection(query, key, qk_weight):
     return query, key
 
 
-def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start_ids=None, neuron_config=None):
+def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start_ids=None, neuron_config=None,
+                          update_indices=None):
     """
     The fused K/V cache update is intended for reducing replicated index value calculation for both keys and values,
     since we are updating K/V with the same index offset.
 
     KeyCache[I], ValueCache[I] = Keys, Values
+
+    If update_indices is provided, it is used as the precomputed scatter
+    indices (e.g. computed once per forward step and shared across layers)
+    instead of deriving them from cache_ids/start_ids.
     """
     # Check K/V cache layout
     bsh_cache_layout = False
@@ -166,22 +183,35 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
 
     dtype = cached_keys.dtype
     cache_ids_dtype = cache_ids.dtype
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        keys = hlo.quantize_kv_cache(keys, neuron_config)
+        vals = hlo.quantize_kv_cache(vals, neuron_config)
     use_2d_cache_ids = len(cache_ids.sizes) > 1
     if not use_2d_cache_ids:
-        updated_keys = update_cache(cached_keys, cache_ids, keys)
-        updated_vals = update_cache(cached_vals, cache_ids, vals)
+        if cache_ids.sizes[0] == 1 and keys.sizes[0] == 1:
+            # Single-position updates lower to DynamicUpdateSlice (see update_cache)
+            updated_keys = update_cache(cached_keys, cache_ids, keys)
+            updated_vals = update_cache(cached_vals, cache_ids, vals)
+            return updated_keys, updated_vals
+        scatter_dims = dict(update_window_dims=[1,2,3],
+                            inserted_window_dims=[0],
+                            scatter_dims_to_operand_dims=[0],
+                            index_vector_dim=1)
+        assign_func = hlo.gen_fused_assign_func(dtype)
+        updated_keys, updated_vals = hlo.fused_scatter(cached_keys, cached_vals, cache_ids, keys, vals,
+                                                       scatter_dims=scatter_dims, to_apply=assign_func)
         return updated_keys, updated_vals
 
-    # 2D cache_ids
-    cache_ids = hlo.transpose(cache_ids, 0, 1)
-    assign_func = hlo.gen_assign_func(dtype)
+    # 2D cache_ids, kept in their original (n_seqs, n_active_tokens) layout;
+    # the update_indices_* helpers compute scatter indices on it directly.
+    assign_func = hlo.gen_fused_assign_func(dtype)
     if bsh_cache_layout:
         n_seqs, n_positions, n_kv_heads, d_head = cached_keys.sizes
         n_active_seqs, n_active_tokens, _, _  = keys.sizes
     else:
         n_positions, n_seqs, n_kv_heads, d_head = cached_keys.sizes
         n_active_tokens, n_active_seqs, _, _  = keys.sizes
-    assert cache_ids.sizes[0] == n_active_tokens, \
+    assert cache_ids.sizes[1] == n_active_tokens, \
         f"inconsistent sizes between cache_ids ({cache_ids.sizes}) and values ({keys.sizes})"
 
     # reshape cache, and scatter values in a for loop.
@@ -200,7 +230,7 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         # seq 1  |        [C,D]
         # seq 2  |                         [E,F]
         #        +-----------------------------------------------
-        # seq_ids:      cache_ids: (n_active_tokens, n_seqs)     values: (n_active_tokens, n_seqs, n_heads, d_head)
+        # seq_ids:      cache_ids: (n_seqs, n_active_tokens)     values: (n_active_tokens, n_seqs, n_heads, d_head)
         # seq 0         [[6,7],                                  [[A,B],
         # seq 1          [3,4],                                   [C,D],
         # seq 2          [9,10]]                                  [E,F]]
@@ -208,15 +238,16 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         keys_r = hlo.reshape(keys, [n_seqs, kv_hidden_size])
         vals_r = hlo.reshape(vals, [n_seqs, kv_hidden_size])
 
-        indices = attention_utils.update_indices_decode(cached_keys, cache_ids, neuron_config)
-        indices = hlo.transpose(indices, 0, 1)
+        indices = update_indices
+        if indices is None:
+            indices = attention_utils.update_indices_decode(cached_keys, cache_ids, neuron_config)
 
         scatter_dims = dict(update_window_dims=[1],
                             inserted_window_dims=[0],
                             scatter_dims_to_operand_dims=[0],
                             index_vector_dim=1)
-        updated_keys = hlo.scatter(cached_keys_r, indices, keys_r, scatter_dims=scatter_dims, to_apply=assign_func)
-        updated_vals = hlo.scatter(cached_vals_r, indices, vals_r, scatter_dims=scatter_dims, to_apply=assign_func)
+        updated_keys, updated_vals = hlo.fused_scatter(cached_keys_r, cached_vals_r, indices, keys_r, vals_r,
+                                                       scatter_dims=scatter_dims, to_apply=assign_func)
 
     elif n_active_tokens == n_positions and n_seqs > n_active_seqs:
         # cache (2D): [n_positions * n_seqs, n_kv_heads * d_head]
@@ -225,12 +256,14 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         # seq 1  |[A,B,C,D,E,F] <- insert new sequence here
         # seq 2  |[y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y]
         #        +-----------------------------------------------
-        # seq_ids:      cache_ids: (n_active_tokens, n_seqs)     values: (n_active_tokens, n_seqs, n_heads, d_head)
+        # seq_ids:      cache_ids: (n_seqs, n_active_tokens)     values: (n_active_tokens, n_seqs, n_heads, d_head)
         # seq 1         [[0,1,2,3,4,5]]                          [[A,B,C,D,E,F]]
         keys_r = hlo.reshape(keys, [n_active_tokens, kv_hidden_size])
         vals_r = hlo.reshape(vals, [n_active_tokens, kv_hidden_size])
 
-        indices = attention_utils.update_indices_context(cached_keys, cache_ids, start_ids, neuron_config)
+        indices = update_indices
+        if indices is None:
+            indices = attention_utils.update_indices_context(cached_keys, cache_ids, start_ids, neuron_config)
 
         # For prefill, assuming n_active_seqs == 1, due to KV cache layout issue.
         assert n_active_seqs == 1, "n_active_seqs is expected to be 1 for 2D cache_ids"
@@ -239,8 +272,8 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
                             inserted_window_dims=[0],
                             scatter_dims_to_operand_dims=[0],
                             index_vector_dim=1)
-        updated_keys = hlo.scatter(cached_keys_r, indices, keys_r, scatter_dims=scatter_dims, to_apply=assign_func)
-        updated_vals = hlo.scatter(cached_vals_r, indices, vals_r, scatter_dims=scatter_dims, to_apply=assign_func)
+        updated_keys, updated_vals = hlo.fused_scatter(cached_keys_r, cached_vals_r, indices, keys_r, vals_r,
+                                                       scatter_dims=scatter_dims, to_apply=assign_func)
 
     elif n_active_tokens > 1 and n_active_tokens < n_positions:
         # Speculative forward: n_active_tokens > 1 and < n_positions
@@ -251,13 +284,15 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         # seq 1  |[y,y,y,y,y,y,y,y,y,A,B,C,D,E,F] <- Append or modify 5 tokens to this sequence
         # seq 2  |[z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z]
         #        +-----------------------------------------------
-        # seq_ids:      cache_ids: (n_active_tokens, n_seqs)     values: (n_active_tokens, n_seqs, n_heads, d_head)
+        # seq_ids:      cache_ids: (n_seqs, n_active_tokens)     values: (n_active_tokens, n_seqs, n_heads, d_head)
         # seq 1         [[45,46,47,48,49,50]]                    [[A,B,C,D,E,F]]
         n_active_tokens, batch_size, n_head, d_head = keys.sizes
         keys_r = hlo.reshape(keys, [n_active_tokens * batch_size, n_head, d_head])
         vals_r = hlo.reshape(vals, [n_active_tokens * batch_size, n_head, d_head])
 
-        indices = attention_utils.update_indices_speculative(cached_keys, cache_ids, start_ids, neuron_config)
+        indices = update_indices
+        if indices is None:
+            indices = attention_utils.update_indices_speculative(cached_keys, cache_ids, start_ids, neuron_config)
         updated_keys, updated_vals = hlo.reshape_and_cache(keys_r, vals_r, cached_keys, cached_vals, indices)
 
     else:
@@ -274,6 +309,14 @@ def update_cache(cache, cache_ids, values):
     """
     dtype = values.dtype
     cache_size = cache.sizes
+    if len(cache_ids.sizes) == 1 and cache_ids.sizes[0] == 1 and values.sizes[0] == 1:
+        # Single-position update (regular token generation): the update is a
+        # contiguous row write, so lower it to a DynamicUpdateSlice instead of
+        # a scatter with its per-index bookkeeping.
+        zero = cache_ids.dtype.Constant(constant_value=0)
+        start = hlo.squeeze(cache_ids, 0)
+        start_indices = [start] + [zero] * (len(cache_size) - 1)
+        return hlo.dynamic_update_slice(cache, values, start_indices)
     scatter_dims = dict(update_window_dims=[1,2,3],
                         inserted_window_dims=[0],
                         scatter_dims_to_operand_dims=[0],
@@ -314,6 +357,9 @@ def score(query, keys, tp_degree=None, n_kv_heads=0, neuron_config=None):
     scribe = query.scribe
     pred = scribe.pred
 
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        keys = hlo.dequantize_kv_cache(keys, dtype, neuron_config)
+
     if n_kv_heads != 0:
         if shard_over_batch:
             n_active_tokens, n_seqs_per_nc, n_heads, _ = query.sizes
@@ -323,7 +369,8 @@ def score(query, keys, tp_degree=None, n_kv_heads=0, neuron_config=None):
             n_active_tokens, n_seqs, n_heads_tp, _ = query.sizes
             n_positions, n_seqs, n_kv_heads_tp, _ = keys.sizes
             n_repeats = n_heads_tp // n_kv_heads_tp
-        keys = hlo.repeat_kv(keys, n_repeats=n_repeats, repeat_dim=2)
+        if n_repeats > 1:
+            return attention_utils.group_query_score(query, keys, n_repeats, neuron_config)
 
     # Q @ K
     batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
@@ -351,7 +398,11 @@ def mask(score, mask, tp_degree=None, shard_over_batch=False, constant_val=-3000
     # Note: This value can cause NaN issues if it is too large
     const = dtype.Constant(constant_value=constant_val) # Valid for fp32/fp16/bf16
     const_br = dtype[score_sizes].Broadcast(const, dimensions=[])
-    if len(mask.sizes) == 2:
+    if len(mask.sizes) == len(score_sizes):
+        # Caller already broadcast the mask to the score shape (e.g. once for
+        # all layers); use it as-is instead of materializing another copy.
+        mask_br = mask
+    elif len(mask.sizes) == 2:
         mask_br = hlo.broadcast(mask, score_sizes, broadcast_dimensions=[0, 3])
     else:
         mask_br = hlo.broadcast(mask, score_sizes , broadcast_dimensions=[0, 2, 3])
@@ -372,8 +423,8 @@ def context(past_scores, active_score, past_values, active_values, n_kv_heads=0,
 
     If n_kv_heads != 0, uses multi-query, multi-group attention.
     If dtype is None, uses values datatype.
-    If both sparse_mask and active_sparse_mask are provided, use sparse attention by masking them on
-    top of the softmax results.
+    If both sparse_mask and active_sparse_mask are provided, use sparse attention by masking the
+    scores before the softmax.
     """
     shard_over_batch=False
     bsh_cache_layout = False
@@ -388,6 +439,10 @@ def context(past_scores, active_score, past_values, active_values, n_kv_heads=0,
     scribe = active_score.scribe
     f32 = scribe.f32
 
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        past_values = hlo.dequantize_kv_cache(past_values, dtype, neuron_config)
+        active_values = hlo.dequantize_kv_cache(active_values, dtype, neuron_config)
+
     n_seqs, n_heads_tp, n_active_tokens, n_active_tokens = active_score_sizes = active_score.sizes
     n_seqs, n_heads_tp, n_active_tokens, n_positions = past_scores.sizes
     if bsh_cache_layout:
@@ -395,70 +450,76 @@ def context(past_scores, active_score, past_values, active_values, n_kv_heads=0,
     else:
         n_positions, n_seqs, n_kv_heads_tp, d_head = past_values.sizes
 
-    # Upcast to f32 before computation
-    past_scores = hlo.cast(past_scores, f32)
-    active_score = hlo.cast(active_score, f32)
+    # Upcast to f32 before computation unless configured otherwise. Keeping
+    # the softmax in the score dtype avoids round-tripping the largest
+    # attention intermediate through f32.
+    cmp_dtype = f32
+    if neuron_config is not None and not neuron_config.attention_softmax_in_fp32:
+        cmp_dtype = active_score.dtype
+    past_scores = hlo.cast(past_scores, cmp_dtype)
+    active_score = hlo.cast(active_score, cmp_dtype)
 
-    # Compute maximum of both past_scores and active_scores
     reduce_sizes = n_seqs, n_heads_tp, n_active_tokens
-    minus_inf = f32.Constant(constant_value=float('-inf'))
-    max_func = hlo.gen_max_func(f32)
-    reduce_max = f32[reduce_sizes].Reduce(past_scores, minus_inf, dimensions=[3], to_apply=max_func)
-    active_reduce_max = f32[reduce_sizes].Reduce(active_score, minus_inf, dimensions=[3], to_apply=max_func)
-    reduce_max = f32[reduce_sizes].Maximum(reduce_max, active_reduce_max)
-    reduce_max_br = f32[past_scores.sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
+    minus_inf = cmp_dtype.Constant(constant_value=float('-inf'))
+    max_func = hlo.gen_max_func(cmp_dtype)
+    zero = cmp_dtype.Constant(constant_value=0)
+    add_func = hlo.gen_add_func(cmp_dtype)
 
     # Pa = softmax(Sa)
     # Pp = softmax(Sp)
-    score_shifted = f32[past_scores.sizes].Subtract(past_scores, reduce_max_br)
-    exp = f32[past_scores.sizes].Exp(score_shifted)
-    if sparse_mask is not None:
-        exp = mask(exp, sparse_mask, 0)
-    zero = f32.Constant(constant_value=0)
-    add_func = hlo.gen_add_func(f32)
-    denom = f32[reduce_sizes].Reduce(exp, zero, dimensions=[3], to_apply=add_func)
-    past_prob = dtype[exp.sizes].Convert(exp)
-    reduce_max_bra = f32[active_score_sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
-    active_score_shifted = f32[active_score_sizes].Subtract(active_score, reduce_max_bra)
-    active_prob = f32[active_score_sizes].Exp(active_score_shifted)
-    if active_sparse_mask is not None:
-        active_prob = mask(active_prob, active_sparse_mask, 0)
-    active_denom = f32[reduce_sizes].Reduce(active_prob, zero, dimensions=[3], to_apply=add_func)
-    denom = f32[reduce_sizes].Add(denom, active_denom)
-    active_prob = dtype[active_prob.sizes].Convert(active_prob)
+    if sparse_mask is None:
+        # Concatenate the past and active scores along the position dimension
+        # so one reduction computes the shared row max and, after the
+        # exponential, one reduction computes the whole denominator.
+        all_scores = hlo.concatenate([past_scores, active_score], dimension=3)
+        all_sizes = all_scores.sizes
+        reduce_max = cmp_dtype[reduce_sizes].Reduce(all_scores, minus_inf, dimensions=[3], to_apply=max_func)
+        reduce_max_br = cmp_dtype[all_sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
+        score_shifted = cmp_dtype[all_sizes].Subtract(all_scores, reduce_max_br)
+        exp = cmp_dtype[all_sizes].Exp(score_shifted)
+        denom = cmp_dtype[reduce_sizes].Reduce(exp, zero, dimensions=[3], to_apply=add_func)
+        exp = hlo.cast(exp, dtype)
+        past_prob = hlo.slice_along(exp, 3, n_positions, start=0)
+        active_prob = hlo.slice_along(exp, 3, n_positions + n_active_tokens, start=n_positions)
+    else:
+        # Sparse attention masks the past and active scores separately, so
+        # keep the split reductions.
+        reduce_max = cmp_dtype[reduce_sizes].Reduce(past_scores, minus_inf, dimensions=[3], to_apply=max_func)
+        active_reduce_max = cmp_dtype[reduce_sizes].Reduce(active_score, minus_inf, dimensions=[3], to_apply=max_func)
+        reduce_max = cmp_dtype[reduce_sizes].Maximum(reduce_max, active_reduce_max)
+        reduce_max_br = cmp_dtype[past_scores.sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
+
+        score_shifted = cmp_dtype[past_scores.sizes].Subtract(past_scores, reduce_max_br)
+        # Mask before the exponential: exp(-30000) underflows to exactly zero,
+        # so masked positions drop out of both the numerator and denominator
+        # and the Select executes on the cheaper pre-exp tensor.
+        score_shifted = mask(score_shifted, sparse_mask)
+        exp = cmp_dtype[past_scores.sizes].Exp(score_shifted)
+        denom = cmp_dtype[reduce_sizes].Reduce(exp, zero, dimensions=[3], to_apply=add_func)
+        past_prob = hlo.cast(exp, dtype)
+        reduce_max_bra = cmp_dtype[active_score_sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
+        active_score_shifted = cmp_dtype[active_score_sizes].Subtract(active_score, reduce_max_bra)
+        active_score_shifted = mask(active_score_shifted, active_sparse_mask)
+        active_prob = cmp_dtype[active_score_sizes].Exp(active_score_shifted)
+        active_denom = cmp_dtype[reduce_sizes].Reduce(active_prob, zero, dimensions=[3], to_apply=add_func)
+        denom = cmp_dtype[reduce_sizes].Add(denom, active_denom)
+        active_prob = hlo.cast(active_prob, dtype)
 
     # Ca = Pa @ Va
     # Cp = Pp @ Vp
-    # C = Ca + Cp
-    sizes = n_seqs, n_heads_tp, n_active_tokens, d_head
-    dot_dims = dict(lhs_contracting_dimensions=[3],
-                    lhs_batch_dimensions=[0, 1],
-                    rhs_contracting_dimensions=[0],
-                    rhs_batch_dimensions=[1, 2])
-    denom = dtype[denom.sizes].Convert(denom)
+    # C = (Ca + Cp) / denom
+    denom = hlo.cast(denom, dtype)
 
+    n_repeats = 1
     if n_kv_heads != 0:
         n_repeats = n_heads_tp // n_kv_heads_tp
-        past_values = hlo.repeat_kv(past_values, n_repeats=n_repeats, repeat_dim=2)
-        active_values = hlo.repeat_kv(active_values, n_repeats=n_repeats, repeat_dim=2)
 
     # lhs (past_prob): (n_seqs, n_heads, n_active_tokens, n_positions)
     # rhs (value):
     # - SBH cache layout: (n_positions, n_seqs, n_heads, d_head)
     # - BSH cache layout: (n_seqs, n_positions, n_heads, d_head)
-    rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
-    rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
-    dot_dims = dict(lhs_contracting_dimensions=[3],
-                lhs_batch_dimensions=[0, 1],
-                rhs_contracting_dimensions=rhs_contracting_dimensions,
-                rhs_batch_dimensions=rhs_batch_dimensions)
-
-    output = hlo.dot_general(past_prob, past_values, dimension_numbers=dot_dims)
-    active_output = hlo.dot_general(active_prob, active_values, dimension_numbers=dot_dims)
-
-    output = dtype[sizes].Add(output, active_output)
-    denom_br = dtype[sizes].Broadcast(denom, dimensions=[0, 1, 2])
-    output = dtype[sizes].Divide(output, denom_br)
+    output = attention_utils.fused_pv_combine(past_prob, past_values, active_prob, active_values,
+                                              denom, n_repeats=n_repeats, neuron_config=neuron_config)
     sizes = n_seqs, n_active_tokens, n_heads_tp, d_head
     output = dtype[sizes].Transpose(output, dimensions=[0, 2, 1, 3])
     return output
@@ -479,7 +540,7 @@ def context_combined(score, values, tp_degree=None, n_kv_heads=0, dtype=None, sp
 
     If n_kv_heads != 0, uses multi-query, multi-group attention.
     If dtype is None, uses values datatype.
-    If sparse_mask is not None, apply sparse mask after the softmax
+    If sparse_mask is not None, apply sparse mask before the softmax
     """
     shard_over_batch=False
     bsh_cache_layout = False
@@ -487,10 +548,14 @@ def context_combined(score, values, tp_degree=None, n_kv_heads=0, dtype=None, sp
         shard_over_batch = neuron_config.group_query_attention == GQA.SHARD_OVER_BATCH
         bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
 
-    probs = hlo.softmax(score)
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        values = hlo.dequantize_kv_cache(values, score.dtype, neuron_config)
+
     if sparse_mask is not None:
-        # Mask with 0 because we have probabilities here
-        probs = mask(probs, sparse_mask, constant_val=0)
+        # Mask the scores before the softmax so masked positions are excluded
+        # from the normalization, consistent with the split context path.
+        score = mask(score, sparse_mask)
+    probs = hlo.softmax(score)
 
     n_seqs, n_heads_tp, n_active_tokens, n_positions = probs.sizes
     if bsh_cache_layout:
@@ -502,26 +567,25 @@ def context_combined(score, values, tp_degree=None, n_kv_heads=0, dtype=None, sp
         dtype = values.dtype
     probs = hlo.cast(probs, dtype)
 
+    n_repeats = 1
     if n_kv_heads != 0:
         n_repeats = n_heads_tp // n_kv_heads_tp
-        values = hlo.repeat_kv(values, n_repeats=n_repeats, repeat_dim=2)
 
-    rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
-    rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
-    dot_dims = dict(
-        lhs_contracting_dimensions=[3],
-        lhs_batch_dimensions=[0, 1],
-        rhs_contracting_dimensions=rhs_contracting_dimensions,
-        rhs_batch_dimensions=rhs_batch_dimensions
-    )
-    result = hlo.dot_general(probs, values, dimension_numbers=dot_dims)
+    if n_repeats > 1:
+        result = attention_utils.group_query_context(probs, values, n_repeats, neuron_config)
+    else:
+        rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
+        rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
+        dot_dims = dict(
+            lhs_contracting_dimensions=[3],
+            lhs_batch_dimensions=[0, 1],
+            rhs_contracting_dimensions=rhs_contracting_dimensions,
+            rhs_batch_dimensions=rhs_batch_dimensions
+        )
+        result = hlo.dot_general(probs, values, dimension_numbers=dot_dims)
 
     if n_kv_heads != 0:
         if shard_over_batch:
-            scribe = result.scribe
-            s32 = scribe.s32
-            zero = s32.Constant(constant_value=0)
-
             # update terminology
             n_seqs_per_nc = n_seqs
             n_heads = n_heads_tp
@@ -530,9 +594,7 @@ def context_combined(score, values, tp_degree=None, n_kv_heads=0, dtype=None, sp
             result = hlo.reshape(result, result_sizes)
 
             # concat along batch dimension and split along head dimension
-            slice_size = n_heads // tp_degree
-            full_result = hlo.all_gather(result, dim=0, tp_degree=tp_degree)
-            result = hlo.dynamic_slice_along(full_result, dim=1, start=zero, size=slice_size)
+            result = hlo.all_to_all(result, split_dim=1, concat_dim=0, tp_degree=tp_degree)
 
             # update n_seqs
             n_seqs = n_seqs_per_nc * tp_degree
@@ -49,7 +49,9 @@ def query_key_value(
     dtype = hidden.dtype
     hidden_size, n_active_tokens, n_seqs = hidden.sizes
     _, hidden_size_tp = q_weight.sizes
-    fuse_qkv = neuron_config and neuron_config.fuse_qkv
+    # A missing K weight means the Q/K/V projections were fused into a single
+    # weight at load time (see DecoderLayer.to_neuron).
+    fuse_qkv = (neuron_config and neuron_config.fuse_qkv) or k_weight is None
     if fuse_qkv:
         # If KV head count explicit, find Q head count
         if n_kv_heads_tp != None:
@@ -200,12 +202,17 @@ def query_key_projection(query, key, qk_weight):
     return query, key
 
 
-def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start_ids=None, neuron_config=None):
+def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start_ids=None, neuron_config=None,
+                          update_indices=None):
     """
     The fused K/V cache update is intended for reducing replicated index value calculation for both keys and values,
     since we are updating K/V with the same index offset.
 
     KeyCache[I], ValueCache[I] = Keys, Values
+
+    If update_indices is provided, it is used as the precomputed scatter
+    indices (e.g. computed once per forward step and shared across layers)
+    instead of deriving them from cache_ids/start_ids.
     """
     # Check K/V cache layout
     bsh_cache_layout = False
@@ -214,22 +221,35 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
 
     dtype = cached_keys.dtype
     cache_ids_dtype = cache_ids.dtype
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        keys = hlo.quantize_kv_cache(keys, neuron_config)
+        vals = hlo.quantize_kv_cache(vals, neuron_config)
     use_2d_cache_ids = len(cache_ids.sizes) > 1
     if not use_2d_cache_ids:
-        updated_keys = update_cache(cached_keys, cache_ids, keys)
-        updated_vals = update_cache(cached_vals, cache_ids, vals)
+        if cache_ids.sizes[0] == 1 and keys.sizes[0] == 1:
+            # Single-position updates lower to DynamicUpdateSlice (see update_cache)
+            updated_keys = update_cache(cached_keys, cache_ids, keys)
+            updated_vals = update_cache(cached_vals, cache_ids, vals)
+            return updated_keys, updated_vals
+        scatter_dims = dict(update_window_dims=[1,2,3],
+                            inserted_window_dims=[0],
+                            scatter_dims_to_operand_dims=[0],
+                            index_vector_dim=1)
+        assign_func = hlo.gen_fused_assign_func(dtype)
+        updated_keys, updated_vals = hlo.fused_scatter(cached_keys, cached_vals, cache_ids, keys, vals,
+                                                       scatter_dims=scatter_dims, to_apply=assign_func)
         return updated_keys, updated_vals
 
-    # 2D cache_ids
-    cache_ids = hlo.transpose(cache_ids, 0, 1)
-    assign_func = hlo.gen_assign_func(dtype)
+    # 2D cache_ids, kept in their original (n_seqs, n_active_tokens) layout;
+    # the update_indices_* helpers compute scatter indices on it directly.
+    assign_func = hlo.gen_fused_assign_func(dtype)
     if bsh_cache_layout:
         n_seqs, n_positions, n_kv_heads, d_head = cached_keys.sizes
         n_active_seqs, n_active_tokens, _, _  = keys.sizes
     else:
         n_positions, n_seqs, n_kv_heads, d_head = cached_keys.sizes
         n_active_tokens, n_active_seqs, _, _  = keys.sizes
-    assert cache_ids.sizes[0] == n_active_tokens, \
+    assert cache_ids.sizes[1] == n_active_tokens, \
         f"inconsistent sizes between cache_ids ({cache_ids.sizes}) and values ({keys.sizes})"
 
     # reshape cache, and scatter values in a for loop.
@@ -248,7 +268,7 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         # seq 1  |        [C,D]
         # seq 2  |                         [E,F]
         #        +-----------------------------------------------
-        # seq_ids:      cache_ids: (n_active_tokens, n_seqs)     values: (n_active_tokens, n_seqs, n_heads, d_head)
+        # seq_ids:      cache_ids: (n_seqs, n_active_tokens)     values: (n_active_tokens, n_seqs, n_heads, d_head)
         # seq 0         [[6,7],                                  [[A,B],
         # seq 1          [3,4],                                   [C,D],
         # seq 2          [9,10]]                                  [E,F]]
@@ -256,15 +276,16 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         keys_r = hlo.reshape(keys, [n_seqs, kv_hidden_size])
         vals_r = hlo.reshape(vals, [n_seqs, kv_hidden_size])
 
-        indices = attention_utils.update_indices_decode(cached_keys, cache_ids, neuron_config)
-        indices = hlo.transpose(indices, 0, 1)
+        indices = update_indices
+        if indices is None:
+            indices = attention_utils.update_indices_decode(cached_keys, cache_ids, neuron_config)
 
         scatter_dims = dict(update_window_dims=[1],
                             inserted_window_dims=[0],
                             scatter_dims_to_operand_dims=[0],
                             index_vector_dim=1)
-        updated_keys = hlo.scatter(cached_keys_r, indices, keys_r, scatter_dims=scatter_dims, to_apply=assign_func)
-        updated_vals = hlo.scatter(cached_vals_r, indices, vals_r, scatter_dims=scatter_dims, to_apply=assign_func)
+        updated_keys, updated_vals = hlo.fused_scatter(cached_keys_r, cached_vals_r, indices, keys_r, vals_r,
+                                                       scatter_dims=scatter_dims, to_apply=assign_func)
 
     elif n_active_tokens == n_positions and n_seqs > n_active_seqs:
         # cache (2D): [n_positions * n_seqs, n_kv_heads * d_head]
@@ -273,12 +294,14 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         # seq 1  |[A,B,C,D,E,F] <- insert new sequence here
         # seq 2  |[y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y,y]
         #        +-----------------------------------------------
-        # seq_ids:      cache_ids: (n_active_tokens, n_seqs)     values: (n_active_tokens, n_seqs, n_heads, d_head)
+        # seq_ids:      cache_ids: (n_seqs, n_active_tokens)     values: (n_active_tokens, n_seqs, n_heads, d_head)
         # seq 1         [[0,1,2,3,4,5]]                          [[A,B,C,D,E,F]]
         keys_r = hlo.reshape(keys, [n_active_tokens, kv_hidden_size])
         vals_r = hlo.reshape(vals, [n_active_tokens, kv_hidden_size])
 
-        indices = attention_utils.update_indices_context(cached_keys, cache_ids, start_ids, neuron_config)
+        indices = update_indices
+        if indices is None:
+            indices = attention_utils.update_indices_context(cached_keys, cache_ids, start_ids, neuron_config)
 
         # For prefill, assuming n_active_seqs == 1, due to KV cache layout issue.
         assert n_active_seqs == 1, "n_active_seqs is expected to be 1 for 2D cache_ids"
@@ -287,8 +310,8 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
                             inserted_window_dims=[0],
                             scatter_dims_to_operand_dims=[0],
                             index_vector_dim=1)
-        updated_keys = hlo.scatter(cached_keys_r, indices, keys_r, scatter_dims=scatter_dims, to_apply=assign_func)
-        updated_vals = hlo.scatter(cached_vals_r, indices, vals_r, scatter_dims=scatter_dims, to_apply=assign_func)
+        updated_keys, updated_vals = hlo.fused_scatter(cached_keys_r, cached_vals_r, indices, keys_r, vals_r,
+                                                       scatter_dims=scatter_dims, to_apply=assign_func)
 
     elif n_active_tokens > 1 and n_active_tokens < n_positions:
         # Speculative forward: n_active_tokens > 1 and < n_positions
@@ -299,13 +322,15 @@ def fused_kv_update_cache(cached_keys, cached_vals, cache_ids, keys, vals, start
         # seq 1  |[y,y,y,y,y,y,y,y,y,A,B,C,D,E,F] <- Modify 5 tokens to this sequence
         # seq 2  |[z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z,z]
         #        +-----------------------------------------------
-        # seq_ids:      cache_ids: (n_active_tokens, n_seqs)     values: (n_active_tokens, n_seqs, n_heads, d_head)
+        # seq_ids:      cache_ids: (n_seqs, n_active_tokens)     values: (n_active_tokens, n_seqs, n_heads, d_head)
         # seq 1         [[45,46,47,48,49,50]]                    [[A,B,C,D,E,F]]
         n_active_tokens, batch_size, n_head, d_head = keys.sizes
         keys_r = hlo.reshape(keys, [n_active_tokens * batch_size, n_head, d_head])
         vals_r = hlo.reshape(vals, [n_active_tokens * batch_size, n_head, d_head])
 
-        indices = attention_utils.update_indices_speculative(cached_keys, cache_ids, start_ids, neuron_config)
+        indices = update_indices
+        if indices is None:
+            indices = attention_utils.update_indices_speculative(cached_keys, cache_ids, start_ids, neuron_config)
 
         updated_keys, updated_vals = hlo.reshape_and_cache(keys_r, vals_r, cached_keys, cached_vals, indices)
 
@@ -323,6 +348,14 @@ def update_cache(cache, cache_ids, values):
     """
     dtype = cache.dtype
     cache_ids_dtype = cache_ids.dtype
+    if len(cache_ids.sizes) == 1 and cache_ids.sizes[0] == 1 and values.sizes[0] == 1:
+        # Single-position update (regular token generation): the update is a
+        # contiguous row write, so lower it to a DynamicUpdateSlice instead of
+        # a scatter with its per-index bookkeeping.
+        zero = cache_ids_dtype.Constant(constant_value=0)
+        start = hlo.squeeze(cache_ids, 0)
+        start_indices = [start] + [zero] * (len(cache.sizes) - 1)
+        return hlo.dynamic_update_slice(cache, values, start_indices)
     # 1D cache_ids
     scatter_dims = dict(update_window_dims=[1,2,3],
                         inserted_window_dims=[0],
@@ -360,12 +393,16 @@ def score(query, keys, tp_degree=None, n_kv_heads=0, neuron_config=None):
     if neuron_config is not None:
         bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
 
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        keys = hlo.dequantize_kv_cache(keys, query.dtype, neuron_config)
+
     # Check for MQA/GQA attention
     if n_kv_heads != 0:
         _, _, n_kv_heads_tp, _ = keys.sizes
         _, _, n_heads_tp, _ = query.sizes
         n_repeats = n_heads_tp // n_kv_heads_tp
-        keys = hlo.repeat_kv(keys, n_repeats=n_repeats, repeat_dim=2)
+        if n_repeats > 1:
+            return attention_utils.group_query_score(query, keys, n_repeats, neuron_config)
 
     # Q @ K
     batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
@@ -417,24 +454,26 @@ def mask(score, mask, tp_degree=None, shard_over_batch=False, constant_value=-30
     # Note: This value can cause NaN issues if it is too large
     large_neg = dtype.Constant(constant_value=constant_value) # Valid for fp32/fp16/bf16
     large_neg_br = dtype[score_sizes].Broadcast(large_neg, dimensions=[])
-    if len(mask.sizes) == 2:
+    if len(mask.sizes) == len(score_sizes):
+        # Caller already broadcast the mask to the score shape (e.g. once for
+        # all layers); use it as-is instead of materializing another copy.
+        mask_br = mask
+    elif len(mask.sizes) == 2:
         if shard_over_batch:
             assert isinstance(tp_degree, int), \
                 f"tp_degree ({tp_degree}) is required to be an integer for shard-over-batch."
-            zero = scribe.s32.Constant(constant_value=0)
             n_seqs_per_nc = score_sizes[0]
             assert n_seqs_per_nc == mask.sizes[0] // tp_degree, f"invalid n_seqs_per_nc ({n_seqs_per_nc}) vs mask_sizes ({mask.sizes})"
-            mask = hlo.dynamic_slice_along(mask, dim=0, start=zero, size=n_seqs_per_nc)
+            mask = hlo.slice_along(mask, dim=0, limit=n_seqs_per_nc, start=0)
         # broadcast from [n_seqs, n_active_tokens] to [n_seqs, n_heads, n_active_tokens, n_positions]
         mask_br = hlo.broadcast(mask, score_sizes, [0, 2])
     else:
         if shard_over_batch:
             assert isinstance(tp_degree, int), \
                 f"tp_degree ({tp_degree}) is required to be an integer for shard-over-batch."
-            zero = scribe.s32.Constant(constant_value=0)
             n_seqs_per_nc = score_sizes[0]
             assert n_seqs_per_nc == mask.sizes[0] // tp_degree, f"invalid n_seqs_per_nc ({n_seqs_per_nc}) vs mask_sizes ({mask.sizes})"
-            mask = hlo.dynamic_slice_along(mask, dim=0, start=zero, size=n_seqs_per_nc)
+            mask = hlo.slice_along(mask, dim=0, limit=n_seqs_per_nc, start=0)
         # broadcast from [n_seqs, n_active_tokens, n_positions] to [n_seqs, n_heads, n_active_tokens, n_positions]
         mask_br = hlo.broadcast(mask, score_sizes, [0, 2, 3])
     score = dtype[score_sizes].Select(mask_br, score, large_neg_br)
@@ -468,6 +507,10 @@ def context(past_scores, active_score, past_values, active_values, sparse_mask=N
         shard_over_batch = neuron_config.group_query_attention == constants.GQA.SHARD_OVER_BATCH
         bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
 
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        past_values = hlo.dequantize_kv_cache(past_values, dtype, neuron_config)
+        active_values = hlo.dequantize_kv_cache(active_values, dtype, neuron_config)
+
     n_seqs, n_heads, n_active_tokens, n_active_tokens = active_score_sizes = active_score.sizes
     n_seqs, n_heads, n_active_tokens, n_positions = past_scores.sizes
     if shard_over_batch:
@@ -483,36 +526,41 @@ def context(past_scores, active_score, past_values, active_values, sparse_mask=N
         _, n_heads_tp, _, _ = active_score.sizes
         reduce_sizes = n_seqs, n_heads_tp, n_active_tokens
 
-    # Upcast to f32 before computation
-    past_scores = hlo.cast(past_scores, f32)
-    active_score = hlo.cast(active_score, f32)
+    # Upcast to f32 before computation unless configured otherwise. Keeping
+    # the softmax in the score dtype avoids round-tripping the largest
+    # attention intermediate through f32.
+    cmp_dtype = f32
+    if neuron_config is not None and not neuron_config.attention_softmax_in_fp32:
+        cmp_dtype = active_score.dtype
+    past_scores = hlo.cast(past_scores, cmp_dtype)
+    active_score = hlo.cast(active_score, cmp_dtype)
 
     # Compute maximum of both past_scores and active_scores
-    minus_inf = f32.Constant(constant_value=float('-inf'))
-    max_func = hlo.gen_max_func(f32)
-    reduce_max = f32[reduce_sizes].Reduce(past_scores, minus_inf, dimensions=[3], to_apply=max_func)
-    active_reduce_max = f32[reduce_sizes].Reduce(active_score, minus_inf, dimensions=[3], to_apply=max_func)
-    reduce_max = f32[reduce_sizes].Maximum(reduce_max, active_reduce_max)
-    reduce_max_br = f32[past_scores.sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
+    minus_inf = cmp_dtype.Constant(constant_value=float('-inf'))
+    max_func = hlo.gen_max_func(cmp_dtype)
+    reduce_max = cmp_dtype[reduce_sizes].Reduce(past_scores, minus_inf, dimensions=[3], to_apply=max_func)
+    active_reduce_max = cmp_dtype[reduce_sizes].Reduce(active_score, minus_inf, dimensions=[3], to_apply=max_func)
+    reduce_max = cmp_dtype[reduce_sizes].Maximum(reduce_max, active_reduce_max)
+    reduce_max_br = cmp_dtype[past_scores.sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
 
     # Pa = softmax(Sa)
     # Pp = softmax(Sp)
-    score_shifted = f32[past_scores.sizes].Subtract(past_scores, reduce_max_br)
-    exp = f32[past_scores.sizes].Exp(score_shifted)
-    zero = f32.Constant(constant_value=0)
-    add_func = hlo.gen_add_func(f32)
-    denom = f32[reduce_sizes].Reduce(exp, zero, dimensions=[3], to_apply=add_func)
-    past_prob = dtype[exp.sizes].Convert(exp)
-    reduce_max_bra = f32[active_score_sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
-    active_score_shifted = f32[active_score_sizes].Subtract(active_score, reduce_max_bra)
-    active_prob = f32[active_score_sizes].Exp(active_score_shifted)
-    active_denom = f32[reduce_sizes].Reduce(active_prob, zero, dimensions=[3], to_apply=add_func)
-    denom = f32[reduce_sizes].Add(denom, active_denom)
-    active_prob = dtype[active_prob.sizes].Convert(active_prob)
-
-    # Apply sparse masks after softmax to help compiler optimization
+    score_shifted = cmp_dtype[past_scores.sizes].Subtract(past_scores, reduce_max_br)
+    # Mask before the exponential: exp(-30000) underflows to exactly zero,
+    # so masked positions drop out of both the numerator and denominator.
     if sparse_mask is not None:
-        past_prob = sparse_attn_mask(past_prob, sparse_mask, constant_value=0)
+        score_shifted = sparse_attn_mask(score_shifted, sparse_mask)
+    exp = cmp_dtype[past_scores.sizes].Exp(score_shifted)
+    zero = cmp_dtype.Constant(constant_value=0)
+    add_func = hlo.gen_add_func(cmp_dtype)
+    denom = cmp_dtype[reduce_sizes].Reduce(exp, zero, dimensions=[3], to_apply=add_func)
+    past_prob = hlo.cast(exp, dtype)
+    reduce_max_bra = cmp_dtype[active_score_sizes].Broadcast(reduce_max, dimensions=[0, 1, 2])
+    active_score_shifted = cmp_dtype[active_score_sizes].Subtract(active_score, reduce_max_bra)
+    active_prob = cmp_dtype[active_score_sizes].Exp(active_score_shifted)
+    active_denom = cmp_dtype[reduce_sizes].Reduce(active_prob, zero, dimensions=[3], to_apply=add_func)
+    denom = cmp_dtype[reduce_sizes].Add(denom, active_denom)
+    active_prob = hlo.cast(active_prob, dtype)
 
     # Ca = Pa @ Va
     # Cp = Pp @ Vp
@@ -521,8 +569,9 @@ def context(past_scores, active_score, past_values, active_values, sparse_mask=N
                     lhs_batch_dimensions=[0, 1],
                     rhs_contracting_dimensions=[0],
                     rhs_batch_dimensions=[1, 2])
-    denom = dtype[denom.sizes].Convert(denom)
+    denom = hlo.cast(denom, dtype)
 
+    n_repeats = 1
     if n_kv_heads != 0:
         if shard_over_batch:
             n_heads = n_heads_tp * tp_degree
@@ -532,23 +581,23 @@ def context(past_scores, active_score, past_values, active_values, sparse_mask=N
             _, _, n_kv_heads_tp, *_ = past_values.sizes
             n_repeats = n_heads_tp // n_kv_heads_tp
 
-        # values layout: (n_positions, n_seqs_per_nc, n_kv_heads, d_head) -> repeat_dim=2
-        past_values = hlo.repeat_kv(past_values, n_repeats=n_repeats, repeat_dim=2)
-        active_values = hlo.repeat_kv(active_values, n_repeats=n_repeats, repeat_dim=2)
-
     # lhs (past_prob): (n_seqs, n_heads, n_active_tokens, n_positions)
     # rhs (value):
     # - SBH cache layout: (n_positions, n_seqs, n_heads, d_head)
     # - BSH cache layout: (n_seqs, n_positions, n_heads, d_head)
-    rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
-    rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
-    dot_dims = dict(lhs_contracting_dimensions=[3],
-                lhs_batch_dimensions=[0, 1],
-                rhs_contracting_dimensions=rhs_contracting_dimensions,
-                rhs_batch_dimensions=rhs_batch_dimensions)
+    if n_repeats > 1:
+        output_dot = attention_utils.group_query_context(past_prob, past_values, n_repeats, neuron_config)
+        active_output_dot = attention_utils.group_query_context(active_prob, active_values, n_repeats, neuron_config)
+    else:
+        rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
+        rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
+        dot_dims = dict(lhs_contracting_dimensions=[3],
+                    lhs_batch_dimensions=[0, 1],
+                    rhs_contracting_dimensions=rhs_contracting_dimensions,
+                    rhs_batch_dimensions=rhs_batch_dimensions)
 
-    output_dot = hlo.dot_general(past_prob, past_values, dimension_numbers=dot_dims)
-    active_output_dot = hlo.dot_general(active_prob, active_values, dimension_numbers=dot_dims)
+        output_dot = hlo.dot_general(past_prob, past_values, dimension_numbers=dot_dims)
+        active_output_dot = hlo.dot_general(active_prob, active_values, dimension_numbers=dot_dims)
     output = hlo.add(output_dot, active_output_dot)
 
     if shard_over_batch:
@@ -557,8 +606,11 @@ def context(past_scores, active_score, past_values, active_values, sparse_mask=N
         denom = hlo.all_to_all(denom, split_dim=1, concat_dim=0, tp_degree=tp_degree)
 
     sizes = n_seqs, n_heads_tp, n_active_tokens, d_head
-    denom_br = dtype[sizes].Broadcast(denom, dimensions=[0, 1, 2])
-    output = dtype[sizes].Divide(output, denom_br)
+    # Multiply by the reciprocal of the small per-row denominator instead of
+    # dividing the full context output by a broadcast.
+    reciprocal = hlo.divide(1.0, denom)
+    reciprocal_br = dtype[sizes].Broadcast(reciprocal, dimensions=[0, 1, 2])
+    output = dtype[sizes].Multiply(output, reciprocal_br)
     sizes = n_active_tokens, n_seqs, n_heads_tp, d_head
     output = dtype[sizes].Transpose(output, dimensions=[2, 0, 1, 3])
     return output
@@ -587,10 +639,14 @@ def context_combined(score, values, sparse_mask=None, n_kv_heads=0, dtype=None,
         shard_over_batch = neuron_config.group_query_attention == constants.GQA.SHARD_OVER_BATCH
         bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
 
-    probs = hlo.softmax(score)
-    # Apply sparse masks after softmax to help compiler optimization
+    if neuron_config is not None and neuron_config.kv_cache_quant is not None:
+        values = hlo.dequantize_kv_cache(values, score.dtype, neuron_config)
+
+    # Mask the scores before the softmax so masked positions are excluded
+    # from the normalization, consistent with the split context path.
     if sparse_mask is not None:
-        probs = sparse_attn_mask(probs, sparse_mask, constant_value=0)
+        score = sparse_attn_mask(score, sparse_mask)
+    probs = hlo.softmax(score)
 
     n_seqs, n_heads_tp, n_active_tokens, n_positions = probs.sizes
     _, _, n_kv_heads_tp, d_head = values.sizes
@@ -613,17 +669,19 @@ def context_combined(score, values, sparse_mask=None, n_kv_heads=0, dtype=None,
             else:
                 _, n_seqs, n_kv_heads_tp, d_head = values.sizes
             n_repeats = n_heads_tp // n_kv_heads_tp
-        values = hlo.repeat_kv(values, n_repeats=n_repeats, repeat_dim=2)
 
-    rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
-    rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
-    dot_dims = dict(
-        lhs_contracting_dimensions=[3],
-        lhs_batch_dimensions=[0, 1],
-        rhs_contracting_dimensions=rhs_contracting_dimensions,
-        rhs_batch_dimensions=rhs_batch_dimensions
-    )
-    result = hlo.dot_general(probs, values, dimension_numbers=dot_dims)
+    if n_kv_heads != 0 and n_repeats > 1:
+        result = attention_utils.group_query_context(probs, values, n_repeats, neuron_config)
+    else:
+        rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
+        rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
+        dot_dims = dict(
+            lhs_contracting_dimensions=[3],
+            lhs_batch_dimensions=[0, 1],
+            rhs_contracting_dimensions=rhs_contracting_dimensions,
+            rhs_batch_dimensions=rhs_batch_dimensions
+        )
+        result = hlo.dot_general(probs, values, dimension_numbers=dot_dims)
 
     if n_kv_heads != 0:
         if shard_over_batch:
@@ -29,7 +29,136 @@ def transpose_qkv(query, key, value):
     return query, key, value
 
 
+def group_query_score(query, keys, n_repeats, neuron_config=None):
+    """
+    Compute Q @ K for grouped-query attention without replicating keys.
+
+    The query heads are folded into (n_kv_heads, n_repeats) groups so the dot
+    batches over the shared KV heads directly, instead of materializing an
+    n_repeats-times larger key tensor with repeat_kv.
+
+    query shape [n_active_tokens, n_seqs, n_heads, d_head]
+          (or [n_seqs, n_active_tokens, n_heads, d_head] for BSH caches)
+    keys follow the cache layout with n_kv_heads heads.
+    output shape [n_seqs, n_heads, n_active_tokens, n_positions]
+    """
+    bsh_cache_layout = False
+    if neuron_config is not None:
+        bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
+    _, _, n_kv_heads, d_head = keys.sizes
+    if bsh_cache_layout:
+        n_seqs, n_active_tokens, n_heads, _ = query.sizes
+        n_positions = keys.sizes[1]
+        rhs_batch_dimensions = [0, 2]
+    else:
+        n_active_tokens, n_seqs, n_heads, _ = query.sizes
+        n_positions = keys.sizes[0]
+        rhs_batch_dimensions = [1, 2]
+
+    # Group the query heads by their shared KV head. Repeated heads are
+    # contiguous (see hlo.repeat_kv), so splitting the head dimension into
+    # (n_kv_heads, n_repeats) is a plain reshape; permuting the (small) query
+    # up-front keeps the score output in its usual layout.
+    grouped_sizes = query.sizes[0], query.sizes[1], n_kv_heads, n_repeats, d_head
+    query = hlo.reshape(query, grouped_sizes)
+    dimensions = (0, 2, 3, 1, 4) if bsh_cache_layout else (1, 2, 3, 0, 4)
+    query = hlo.permute(query, dimensions)
+
+    dot_dims = dict(lhs_contracting_dimensions=[4],
+                    lhs_batch_dimensions=[0, 1],
+                    rhs_contracting_dimensions=[3],
+                    rhs_batch_dimensions=rhs_batch_dimensions)
+    score = hlo.dot_general(query, keys, dimension_numbers=dot_dims)
+    return hlo.reshape(score, (n_seqs, n_heads, n_active_tokens, n_positions))
+
+
+def group_query_context(probs, values, n_repeats, neuron_config=None):
+    """
+    Compute P @ V for grouped-query attention without replicating values.
+
+    probs shape [n_seqs, n_heads, n_active_tokens, n_positions]
+    values follow the cache layout with n_kv_heads heads.
+    output shape [n_seqs, n_heads, n_active_tokens, d_head]
+    """
+    bsh_cache_layout = False
+    if neuron_config is not None:
+        bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
+    n_seqs, n_heads, n_active_tokens, n_positions = probs.sizes
+    _, _, n_kv_heads, d_head = values.sizes
+
+    # As in group_query_score, splitting the probability heads into
+    # (n_kv_heads, n_repeats) groups is a plain reshape.
+    probs = hlo.reshape(probs, (n_seqs, n_kv_heads, n_repeats, n_active_tokens, n_positions))
+    rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
+    rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
+    dot_dims = dict(lhs_contracting_dimensions=[4],
+                    lhs_batch_dimensions=[0, 1],
+                    rhs_contracting_dimensions=rhs_contracting_dimensions,
+                    rhs_batch_dimensions=rhs_batch_dimensions)
+    output = hlo.dot_general(probs, values, dimension_numbers=dot_dims)
+    return hlo.reshape(output, (n_seqs, n_heads, n_active_tokens, d_head))
+
+
+# Number of cache positions per block when tiling the past PV product, sized
+# so a block of probabilities and values stays resident in on-chip memory.
+PV_TILE_POSITIONS = 2048
+
+
+def fused_pv_combine(past_prob, past_values, active_prob, active_values, denom,
+                     n_repeats=1, neuron_config=None):
+    """
+    Combine the past and active PV products with a fused normalization.
+
+    C = (Pp @ Vp + Pa @ Va) * (1 / denom)
+
+    Keeping the add and the scale in one region right after the two matmuls
+    lets the compiler fuse them into the matmul epilogue; the reciprocal is
+    computed on the small denominator instead of dividing the full context
+    output by a broadcast.
+
+    For long position ranges, the past product is blocked along n_positions
+    so each block of the probability/value operands is streamed through
+    on-chip memory once and the partial contexts are accumulated.
+    """
+    bsh_cache_layout = False
+    if neuron_config is not None:
+        bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
+
+    def pv_dot(prob, values):
+        if n_repeats > 1:
+            return group_query_context(prob, values, n_repeats, neuron_config)
+        rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
+        rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
+        dot_dims = dict(lhs_contracting_dimensions=[3],
+                        lhs_batch_dimensions=[0, 1],
+                        rhs_contracting_dimensions=rhs_contracting_dimensions,
+                        rhs_batch_dimensions=rhs_batch_dimensions)
+        return hlo.dot_general(prob, values, dimension_numbers=dot_dims)
+
+    n_positions = past_prob.sizes[3]
+    position_dim = 1 if bsh_cache_layout else 0
+    if n_positions > PV_TILE_POSITIONS and n_positions % PV_TILE_POSITIONS == 0:
+        output = None
+        for start in range(0, n_positions, PV_TILE_POSITIONS):
+            limit = start + PV_TILE_POSITIONS
+            prob_tile = hlo.slice_along(past_prob, 3, limit, start=start)
+            values_tile = hlo.slice_along(past_values, position_dim, limit, start=start)
+            partial = pv_dot(prob_tile, values_tile)
+            output = partial if output is None else hlo.add(output, partial)
+    else:
+        output = pv_dot(past_prob, past_values)
+    active_output = pv_dot(active_prob, active_values)
+
+    output = hlo.add(output, active_output)
+    reciprocal = hlo.divide(1.0, denom)
+    reciprocal_br = hlo.broadcast(reciprocal, output.sizes, broadcast_dimensions=[0, 1, 2])
+    return hlo.multiply(output, reciprocal_br)
+
+
 def update_indices_decode(cached_keys, cache_ids, neuron_config=None):
+    # cache_ids are in their original (n_seqs, n_active_tokens) layout, with
+    # n_active_tokens == 1, so the per-sequence iota runs along dimension 0
+    # and the result is already shaped for the cache scatter.
     # Check K/V cache layout
     bsh_cache_layout = False
     if neuron_config is not None:
@@ -43,7 +172,7 @@ def update_indices_decode(cached_keys, cache_ids, neuron_config=None):
         # [6,3,9] -> [(0,6),(1,3),(2,9)] -> [6+0*128,3+1*128,9+2*128] -> [6,131,265]
         # cache_ids + iota * n_positions
         n_positions_br = hlo.full(n_positions, cache_ids_dtype, cache_ids.sizes)
-        offset = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[1])
+        offset = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[0])
         offset = cache_ids_dtype[cache_ids.sizes].Multiply(offset, n_positions_br)
         indices = cache_ids_dtype[cache_ids.sizes].Add(cache_ids, offset)
     else:
@@ -51,12 +180,15 @@ def update_indices_decode(cached_keys, cache_ids, neuron_config=None):
         # cache_ids * n_seqs + iota
         batch_size_br = hlo.full(n_seqs, cache_ids_dtype, cache_ids.sizes)
         indices = cache_ids_dtype[cache_ids.sizes].Multiply(cache_ids, batch_size_br)
-        offset = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[1])
+        offset = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[0])
         indices = cache_ids_dtype[cache_ids.sizes].Add(indices, offset)
     return indices
 
 
 def update_indices_context(cached_keys, cache_ids, start_ids, neuron_config=None):
+    # cache_ids are in their original (n_active_seqs, n_active_tokens) layout
+    # with n_active_seqs == 1, so the per-token iota runs along dimension 1;
+    # the final reshape to (n_active_tokens, 1) is free.
     # Check K/V cache layout
     bsh_cache_layout = False
     if neuron_config is not None:
@@ -66,28 +198,32 @@ def update_indices_context(cached_keys, cache_ids, start_ids, neuron_config=None
     else:
         n_positions, n_seqs, n_kv_heads, d_head = cached_keys.sizes
     cache_ids_dtype = cache_ids.dtype
+    n_active_seqs, n_active_tokens = cache_ids.sizes
     if bsh_cache_layout:
         # [0,1,2,3] -> [(1,0),(1,1),(1,2),(1,3)] -> [1*128+0,1*128+1,1*128+2,1*128+3] -> [128,129,130,140]
         # start_ids * n_positions + iota
         n_positions_br = hlo.full(n_positions, cache_ids_dtype, cache_ids.sizes)
-        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [1])
-        indices = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[0])
+        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [0])
+        indices = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[1])
         offset = cache_ids_dtype[cache_ids.sizes].Multiply(start_ids_br, n_positions_br)
         indices = cache_ids_dtype[cache_ids.sizes].Add(indices, offset)
     else:
         # [0,1,2,3] -> [(1,0),(1,1),(1,2),(1,3)] -> [1+0*3,1+1*3,1+2*3,1+3*3] -> [1,4,7,10]
         # start_ids + iota * n_seqs
         batch_size_br = hlo.full(n_seqs, cache_ids_dtype, cache_ids.sizes)
-        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [1])
-        indices = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[0])
+        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [0])
+        indices = cache_ids_dtype[cache_ids.sizes].Iota(dimensions=[1])
         indices = cache_ids_dtype[cache_ids.sizes].Multiply(indices, batch_size_br)
         indices = cache_ids_dtype[cache_ids.sizes].Add(indices, start_ids_br)
+    indices = hlo.reshape(indices, [n_active_tokens, n_active_seqs])
     return indices
 
 
 def update_indices_speculative(cached_keys, cache_ids, start_ids, neuron_config=None):
     # Check K/V cache layout: similar to `update_indices_context` above,
-    # but handles the case where n_active_tokens > 1 and n_active_tokens < n_positions
+    # but handles the case where n_active_tokens > 1 and n_active_tokens < n_positions.
+    # cache_ids are in their original (batch_size, n_active_tokens) layout;
+    # the indices are flattened token-major for reshape_and_cache.
     bsh_cache_layout = False
     if neuron_config is not None:
         bsh_cache_layout = neuron_config.cache_layout == constants.LAYOUT_BSH
@@ -96,22 +232,21 @@ def update_indices_speculative(cached_keys, cache_ids, start_ids, neuron_config=
     else:
         n_positions, n_seqs, n_kv_heads, d_head = cached_keys.sizes
     cache_ids_dtype = cache_ids.dtype
+    batch_size, n_active_tokens = cache_ids.sizes
     if bsh_cache_layout:
         # start_ids * n_positions + iota
-        n_active_tokens, batch_size = cache_ids.sizes
         n_positions_br = hlo.full(n_positions, cache_ids_dtype, cache_ids.sizes)
-        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [1])
+        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [0])
         offset = hlo.multiply(start_ids_br, n_positions_br)
         indices = hlo.add(offset, cache_ids)
-        indices = hlo.reshape(indices, [n_active_tokens * batch_size])
     else:
         # start_ids + cache_ids * n_seqs
-        n_active_tokens, batch_size = cache_ids.sizes
         batch_size_br = hlo.full(n_seqs, cache_ids_dtype, cache_ids.sizes)
-        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [1])
+        start_ids_br = hlo.broadcast(start_ids, cache_ids.sizes, [0])
         indices = hlo.multiply(cache_ids, batch_size_br)
         indices = hlo.add(indices, start_ids_br)
-        indices = hlo.reshape(indices, [n_active_tokens * batch_size])
+    indices = hlo.transpose(indices, 0, 1)
+    indices = hlo.reshape(indices, [n_active_tokens * batch_size])
     return indices
 
 
@@ -178,18 +313,19 @@ def prior_context(past_scores, past_values,
     past_scores = hlo.cast(past_scores, f32)
     past_prob = hlo.softmax(past_scores)
 
+    n_repeats = 1
     if n_kv_heads != 0:
         _, n_heads_tp, *_ = past_prob.sizes
         _, _, n_kv_heads_tp, *_ = past_values.sizes
         n_repeats = n_heads_tp // n_kv_heads_tp
 
-        # values layout: (n_positions, n_seqs_per_nc, n_kv_heads, d_head) -> repeat_dim=2
-        past_values = hlo.repeat_kv(past_values, n_repeats=n_repeats, repeat_dim=2)
-
     # lhs (past_prob): (n_seqs, n_heads, n_active_tokens, n_positions)
     # rhs (value):
     # - SBH cache layout: (n_positions, n_seqs, n_heads, d_head)
     # - BSH cache layout: (n_seqs, n_positions, n_heads, d_head)
+    if n_repeats > 1:
+        return group_query_context(past_prob, past_values, n_repeats, neuron_config)
+
     rhs_contracting_dimensions = [1] if bsh_cache_layout else [0]
     rhs_batch_dimensions = [0, 2] if bsh_cache_layout else [1, 2]
     dot_dims = dict(lhs_contracting_dimensions=[3],
@@ -203,7 +203,7 @@ class LlamaForSamplingNoEmbeddingHlo:
                                                  tp_degree=tp_degree, neuron_config=self.neuron_config)
 
             # KCache, VCache = K, V
-            if cached_keys.sizes == key.sizes:
+            if cached_keys.sizes == key.sizes and cached_keys.dtype == key.dtype:
                 updated_keys, updated_values = key, value
             else:
                 updated_keys, updated_values = attention.fused_kv_update_cache(cached_keys, cached_values, cache_ids,
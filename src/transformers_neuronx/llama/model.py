@@ -89,6 +89,8 @@ class LlamaForSampling(base.NeuronModelBase):
             attn = layer.self_attn
             mlp = layer.mlp
             new_layer = self.decoder_lm_head.new_layer()
+            # The attention layer builder understands the fused QKV layout
+            new_layer.fuse_qkv_at_load = True
             new_layer.add_pre_attention_layer_norm(layer.input_layernorm.weight.detach(), None)
             new_layer.add_attention_query(attn.q_proj.weight.detach().T, None)
             new_layer.add_attention_key(attn.k_proj.weight.detach().T, None)
@@ -179,8 +179,9 @@ class MistralForSamplingNoEmbeddingHlo:
         query, key = rotary.rotate_half(query, key, pos_embed, self.config.rotary_percentage,
                                         tp_degree=tp_degree, shard_over_batch=shard_over_batch)
 
-        # Q = Q / sqrt(d_head)
-        query = attention.scale(query, d_head)
+        # Q / sqrt(d_head) is already folded into the query projection
+        # weights at load time (see model.load_weights), so no runtime
+        # scaling is needed here.
 
         # In BSH cache layout, the output of QKV linear projection is still kept as SBH for all QKV.
         bsh_cache_layout = False
@@ -237,7 +238,7 @@ class MistralForSamplingNoEmbeddingHlo:
                                                  tp_degree=tp_degree, neuron_config=self.neuron_config)
 
             # KCache, VCache = K, V
-            if cached_keys.sizes == key.sizes:
+            if cached_keys.sizes == key.sizes and cached_keys.dtype == key.dtype:
                 updated_keys, updated_values = key, value
             else:
                 updated_keys, updated_values = attention.fused_kv_update_cache(cached_keys, cached_values, cache_ids,
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+from transformers_neuronx import dtypes
 from transformers_neuronx import utils
 
 class MixtralConfig:
@@ -54,6 +55,11 @@ class MixtralConfig:
         self.amp = amp
         self.tp_degree = tp_degree
 
+        # Resolve the torch dtype once so every submodule can read it instead
+        # of re-parsing the amp string at construction time.
+        amp_dtype, _, _ = utils.parse_amp(amp)
+        self.resolved_dtype = dtypes.to_torch_dtype(amp_dtype)
+
         # Check values of tp_degree
         # The MoE implementation supports 1) tp_degree is divisible by num_local_experts or 2) num_local_experts is divisible by tp_degree
         # However, due to memory limit, only tp_degree = {8, 16, 32} are supported. Note that tp_degree = 8 needs to use f16 or bf16 
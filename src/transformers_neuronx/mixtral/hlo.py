@@ -14,6 +14,7 @@
 # ==============================================================================
 from typing import Optional
 
+from transformers_neuronx import activations
 from transformers_neuronx import hlo
 from transformers_neuronx import constants
 from transformers_neuronx import utils
@@ -96,7 +97,6 @@ class MixtralForSamplingNoEmbeddingHlo(MistralForSamplingNoEmbeddingHlo):
     ):
         is_bsh = self.neuron_config and self.neuron_config.attention_layout == LAYOUT_BSH
         assert not is_bsh, "BSH layout is currently not supported for moe_layer"
-        gated_mlp = hlo.gated_mlp_bsh if is_bsh else hlo.gated_mlp
 
         # Gating network
         dot_dims = dict(lhs_contracting_dimensions=[0], rhs_contracting_dimensions=[0])
@@ -112,47 +112,53 @@ class MixtralForSamplingNoEmbeddingHlo(MistralForSamplingNoEmbeddingHlo):
         # Following expert parallelism implement in https://github.com/vllm-project/vllm/pull/2090
         num_experts_per_core = expert_indices.sizes[0]
         _, intermediate_size = w1_weight_tp.sizes
-        slice_size = intermediate_size // num_experts_per_core
-        slice_size_const = hlo.full(slice_size, dtype=expert_indices.dtype, sizes=[])
-
-        local_hidden_states = None
-        for idx in range(num_experts_per_core):
-            idx_const = hlo.full(idx, dtype=expert_indices.dtype, sizes=[])
-
-            # Slice weight for tp < num_local_experts
-            slice_idx_const = hlo.multiply(idx_const, slice_size_const)
-            w1_weight = hlo.dynamic_slice_along(w1_weight_tp, dim=1, start=slice_idx_const, size=slice_size)
-            w3_weight = hlo.dynamic_slice_along(w3_weight_tp, dim=1, start=slice_idx_const, size=slice_size)
-            w2_weight = hlo.dynamic_slice_along(w2_weight_tp, dim=1, start=slice_idx_const, size=slice_size)
-
-            # Build expert mask
-            expert_idx = hlo.dynamic_slice_along(expert_indices, dim=0, start=idx_const, size=1)
-            expert_idx_br = hlo.broadcast(expert_idx, selected_experts.sizes, [0])
-            expert_idx_br = hlo.cast(expert_idx_br, selected_experts.dtype)
-            expert_mask = hlo.equal(selected_experts, expert_idx_br)
-            expert_mask = hlo.cast(expert_mask, routing_weights.dtype)
-            expert_weights = hlo.multiply(routing_weights, expert_mask)
-            expert_weights = hlo.reduce_sum(expert_weights, dim=0, keepdim=True) # all-reduce across selected experts
-
-            mlp_hidden = gated_mlp(
-                norm_hidden,
-                w1_weight, w3_weight, w2_weight,
-                in0_scales=w1_scales,
-                in1_scales=w3_scales,
-                out_scales=w2_scales,
-                activation_function='silu',
-                tp_degree=self.config.tp_degree,
-                neuron_config=self.neuron_config,
-                return_partial=True,
-            )
-            # Apply expert weighting
-            expert_weights_br = hlo.broadcast(expert_weights, mlp_hidden.sizes, [0, 1, 2])
-            current_hidden_states = hlo.multiply(mlp_hidden, expert_weights_br)
-
-            if local_hidden_states is None:
-                local_hidden_states = current_hidden_states
-            else:
-                local_hidden_states = hlo.add(local_hidden_states, current_hidden_states)
+        hidden_size, n_active_tokens, n_seqs = norm_hidden.sizes
+        n_tokens = n_active_tokens * n_seqs
+
+        # Per-expert routing coefficient: for each (expert slot, token) sum the
+        # routing weights of the top-k entries that picked that expert. Tokens
+        # not routed to an expert get coefficient 0, so its contribution below
+        # vanishes without any data-dependent control flow.
+        k, _, _ = routing_weights.sizes
+        mask_sizes = num_experts_per_core, k, n_active_tokens, n_seqs
+        expert_indices_br = hlo.broadcast(expert_indices, mask_sizes, [0])
+        expert_indices_br = hlo.cast(expert_indices_br, selected_experts.dtype)
+        selected_experts_br = hlo.broadcast(selected_experts, mask_sizes, [1, 2, 3])
+        expert_mask = hlo.equal(selected_experts_br, expert_indices_br)
+        expert_mask = hlo.cast(expert_mask, routing_weights.dtype)
+        routing_weights_br = hlo.broadcast(routing_weights, mask_sizes, [1, 2, 3])
+        expert_weights = hlo.multiply(routing_weights_br, expert_mask)
+        expert_weights = hlo.reduce_sum(expert_weights, dim=1) # sum across selected experts
+
+        # Grouped gated MLP: the per-core expert weights are already
+        # concatenated along the intermediate dimension, so one GEMM per
+        # projection serves all local experts at once instead of slicing out
+        # num_experts_per_core separate matmuls.
+        # (h, s * b) @ (h, e * i) contract=(0, 0) => (s * b, e * i)
+        hidden_r = hlo.reshape(norm_hidden, (hidden_size, n_tokens))
+        hidden_active = hlo.dot00_add1(hidden_r, w1_weight_tp, None, scales=w1_scales, neuron_config=self.neuron_config)
+        hidden_active = activations.silu(hidden_active)
+        hidden_linear = hlo.dot00_add1(hidden_r, w3_weight_tp, None, scales=w3_scales, neuron_config=self.neuron_config)
+        hidden_states = hlo.multiply(hidden_active, hidden_linear)
+
+        # Scale each expert's intermediate block by its routing coefficient;
+        # the shared down-projection then sums over experts via its
+        # contraction over the (e * i) dimension.
+        # (e, s, b) => (s * b, e)
+        expert_weights = hlo.reshape(expert_weights, (num_experts_per_core, n_tokens))
+        expert_weights = hlo.transpose(expert_weights, 0, 1)
+        grouped_sizes = n_tokens, num_experts_per_core, intermediate_size // num_experts_per_core
+        expert_weights_br = hlo.broadcast(expert_weights, grouped_sizes, [0, 1])
+        hidden_states = hlo.reshape(hidden_states, grouped_sizes)
+        hidden_states = hlo.multiply(hidden_states, expert_weights_br)
+        hidden_states = hlo.reshape(hidden_states, (n_tokens, intermediate_size))
+
+        # (s * b, e * i) @ (h, e * i) contract=(1, 1) => (s * b, h)
+        result = hlo.dot11_add1(hidden_states, w2_weight_tp, None, scales=w2_scales, neuron_config=self.neuron_config)
+
+        # (s * b, h) => (h, s, b)
+        result = hlo.transpose(result, 0, 1)
+        local_hidden_states = hlo.reshape(result, norm_hidden.sizes)
 
         dtype, replica_groups = utils.parse_dtype_replica_groups(self.neuron_config, self.config.tp_degree)
         final_hidden_states = hlo.all_reduce_sum(local_hidden_states, self.config.tp_degree, dtype=dtype, replica_groups=replica_groups)
@@ -80,8 +80,13 @@ class MixtralForSampling(base.NeuronModelBase):
             attn = layer.self_attn
             block_sparse_moe = layer.block_sparse_moe
             new_layer = self.decoder_lm_head.new_layer()
+            # The attention layer builder understands the fused QKV layout
+            new_layer.fuse_qkv_at_load = True
             new_layer.add_pre_attention_layer_norm(layer.input_layernorm.weight.detach(), None)
-            new_layer.add_attention_query(attn.q_proj.weight.detach().T, None)
+            # Scale the query projection by 1/sqrt(d_head) at load time, so
+            # the per-token Q / sqrt(d_head) divide is folded into the weights
+            q_scale = self.config.attention_head_size ** -0.5
+            new_layer.add_attention_query(attn.q_proj.weight.detach().T * q_scale, None)
             new_layer.add_attention_key(attn.k_proj.weight.detach().T, None)
             new_layer.add_attention_value(attn.v_proj.weight.detach().T, None)
             if self.neuron_config and self.neuron_config.attention_layout == LAYOUT_BSH:
@@ -12,17 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from transformers_neuronx import dtypes
 from transformers_neuronx import module
-from transformers_neuronx import utils
 
 
 class MixtralForCausalLM(module.PretrainedModel):
 
     def __init__(self, config):
         super().__init__()
-        dtype, _, _ = utils.parse_amp(config.amp)
-        dtype = dtypes.to_torch_dtype(dtype)
+        dtype = config.resolved_dtype
         self.model = MixtralModel(config)
         self.lm_head = module.LowMemoryLazyLinear(config.vocab_size, dtype=dtype, bias=False)
 
@@ -66,8 +63,7 @@ class MixtralAttention(module.LowMemoryModule):
         self.hidden_size = config.hidden_size
         self.num_heads = config.num_attention_heads
         self.head_dim = self.hidden_size // self.num_heads
-        dtype, _, _ = utils.parse_amp(config.amp)
-        dtype = dtypes.to_torch_dtype(dtype)
+        dtype = config.resolved_dtype
         self.q_proj = module.LowMemoryLazyLinear(self.num_heads * self.head_dim, bias=False, dtype=dtype)
         self.k_proj = module.LowMemoryLazyLinear(self.num_heads * self.head_dim, bias=False, dtype=dtype)
         self.v_proj = module.LowMemoryLazyLinear(self.num_heads * self.head_dim, bias=False, dtype=dtype)
@@ -78,8 +74,7 @@ class MixtralBLockSparseTop2MLP(module.LowMemoryModule):
 
     def __init__(self, config):
         super().__init__()
-        dtype, _, _ = utils.parse_amp(config.amp)
-        dtype = dtypes.to_torch_dtype(dtype)
+        dtype = config.resolved_dtype
         self.w1 = module.LowMemoryLazyLinear(config.intermediate_size, bias=False, dtype=dtype)
         self.w2 = module.LowMemoryLazyLinear(config.intermediate_size, bias=False, dtype=dtype)
         self.w3 = module.LowMemoryLazyLinear(config.hidden_size, bias=False, dtype=dtype)
@@ -89,7 +84,6 @@ class MixtralSparseMoeBlock(module.LowMemoryModule):
 
     def __init__(self, config):
         super().__init__()
-        dtype, _, _ = utils.parse_amp(config.amp)
-        dtype = dtypes.to_torch_dtype(dtype)
+        dtype = config.resolved_dtype
         self.gate = module.LowMemoryLazyLinear(config.hidden_size, bias=False, dtype=dtype)
         self.experts = module.LowMemoryModuleList([MixtralBLockSparseTop2MLP(config) for _ in range(config.num_local_experts)])